@@ -6,6 +6,8 @@ import datetime
 import json
 from werkzeug.utils import secure_filename
 from file_parser import extract_text
+from http_compression import (DecompressionError, compress_response,
+                              decompress_file, decompress_request_body)
 import ai_engine
 from ai_engine import generate_tasks
 
@@ -21,6 +23,26 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024 # 16MB max limit
 # Ensure upload dir exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# ── Transfer Compression ──
+# Uploads may arrive gzip/br/zstd-compressed; API JSON goes back compressed
+# when the client's Accept-Encoding allows it.
+
+@app.before_request
+def decompress_upload():
+    # Only API requests carry uploads; leave static files and GETs alone
+    if not request.path.startswith('/api/') or request.method not in ('POST', 'PUT', 'PATCH'):
+        return None
+    try:
+        decompress_request_body(request.environ, app.config['MAX_CONTENT_LENGTH'])
+    except DecompressionError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@app.after_request
+def compress_api_response(response):
+    if request.path.startswith('/api/'):
+        return compress_response(response, request.accept_encodings)
+    return response
+
 # ── API Routes ──
 
 @app.route('/api/generate-tasks', methods=['POST'])
@@ -38,6 +60,12 @@ def handle_generation():
     if 'file' in request.files:
         file = request.files['file']
         if file and file.filename != '':
+            # Unpack pre-compressed uploads (e.g. notes.txt.zst) before parsing
+            try:
+                file = decompress_file(file, app.config['MAX_CONTENT_LENGTH'])
+            except DecompressionError as e:
+                return jsonify({"error": str(e)}), e.status
+
             # Parse file
             content_data = extract_text(file)
             if content_data["type"] == "error":
@@ -100,8 +128,9 @@ def save_history_entry(entry):
     # Limit to last 50 entries to keep file small
     history = history[:50]
     
+    # Compact separators: no indentation whitespace in the stored payloads
     with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2)
+        json.dump(history, f, separators=(',', ':'))
 
 @app.route('/api/history', methods=['GET'])
 def get_history():
@@ -0,0 +1,324 @@
+
+import gzip
+import mimetypes
+import os
+import tempfile
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import get_input_stream
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Negotiated HTTP compression for the API.
+# - Responses: large JSON bodies are compressed with the best encoding the
+#   client accepts (zstd > br > gzip when the client likes them equally).
+# - Uploads: a whole request body sent with a Content-Encoding header, or a
+#   single file part that is compressed (e.g. "notes.txt.zst"), is decompressed
+#   chunk by chunk into a temp file, never growing past MAX_CONTENT_LENGTH.
+# brotli / zstandard are optional; without them only gzip is offered.
+
+MIN_COMPRESS_SIZE = 1024  # Small bodies aren't worth the CPU or the header
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024  # Keep decompressed uploads in memory up to 1MB
+
+ZSTD_MAGIC = 0xFD2FB528
+ZSTD_SKIPPABLE = range(0x184D2A50, 0x184D2A60)
+
+FILE_SUFFIXES = {'.gz': 'gzip', '.br': 'br', '.zst': 'zstd'}
+FILE_MIME_TYPES = {
+    'application/gzip': 'gzip',
+    'application/x-gzip': 'gzip',
+    'application/x-brotli': 'br',
+    'application/zstd': 'zstd',
+}
+
+
+class DecompressionError(Exception):
+    """Raised when an upload can't be decompressed or is too big once inflated."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def supported_encodings():
+    """Encodings we can produce/consume, in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def choose_encoding(accept_encodings):
+    """
+    Picks the response encoding from a Werkzeug Accept-Encoding header object.
+    Returns None if the client accepts none of ours (or only identity).
+    """
+    best, best_quality = None, 0
+    for encoding in supported_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response, accept_encodings):
+    """after_request helper: compresses JSON responses in place when it pays off."""
+    if (response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_bytes(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# ── Upload decompression ──
+
+class _LimitedReader:
+    """Wraps a stream and refuses to hand out more than max_input bytes."""
+
+    def __init__(self, stream, max_input):
+        self.stream = stream
+        self.remaining = max_input
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = CHUNK_SIZE
+        # Read one byte past the limit so an oversized body is detected
+        chunk = self.stream.read(min(size, self.remaining + 1))
+        self.remaining -= len(chunk)
+        if self.remaining < 0:
+            raise DecompressionError("Upload too large", 413)
+        return chunk
+
+
+class _ZstdFrameTracker:
+    """
+    Passes compressed bytes through while walking the zstd frame layout
+    (frame header, block headers, checksum) so we know if the input ended
+    cleanly between frames. Only headers are parsed; block bodies are skipped.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.state = 'magic'
+        self.buf = b''
+        self.skip = 0
+        self.has_checksum = False
+
+    @property
+    def finished(self):
+        return self.state == 'magic' and not self.buf and not self.skip
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self._feed(memoryview(chunk))
+        return chunk
+
+    def _feed(self, data):
+        while data:
+            if self.skip:
+                n = min(self.skip, len(data))
+                self.skip -= n
+                data = data[n:]
+                continue
+            need = {'magic': 4, 'skippable': 4, 'descriptor': 1, 'block': 3}[self.state]
+            take = need - len(self.buf)
+            self.buf += bytes(data[:take])
+            data = data[take:]
+            if len(self.buf) == need:
+                self._advance(int.from_bytes(self.buf, 'little'))
+                self.buf = b''
+
+    def _advance(self, value):
+        if self.state == 'magic':
+            if value == ZSTD_MAGIC:
+                self.state = 'descriptor'
+            elif value in ZSTD_SKIPPABLE:
+                self.state = 'skippable'
+            else:
+                raise DecompressionError("Not a zstd upload")
+        elif self.state == 'skippable':
+            self.skip = value
+            self.state = 'magic'
+        elif self.state == 'descriptor':
+            fcs_flag, single_segment = value >> 6, (value >> 5) & 1
+            self.has_checksum = bool(value & 0x04)
+            # Rest of the frame header: window byte, dictionary ID, content size
+            self.skip = ((0 if single_segment else 1)
+                         + (0, 1, 2, 4)[value & 0x03]
+                         + ((1 if single_segment else 0), 2, 4, 8)[fcs_flag])
+            self.state = 'block'
+        else:
+            last, block_type, block_size = value & 1, (value >> 1) & 3, value >> 3
+            self.skip = 1 if block_type == 1 else block_size  # RLE blocks store one byte
+            if last:
+                self.skip += 4 if self.has_checksum else 0
+                self.state = 'magic'
+
+
+def _iter_decompressed(stream, encoding, max_input):
+    """Yields decompressed chunks, reading at most max_input compressed bytes."""
+    reader = _LimitedReader(stream, max_input)
+
+    if encoding in ('gzip', 'x-gzip'):
+        # GzipFile only pulls what it needs, so each read stays bounded
+        with gzip.GzipFile(fileobj=reader, mode='rb') as gz:
+            while True:
+                out = gz.read(CHUNK_SIZE)
+                if not out:
+                    break
+                yield out
+
+    elif encoding == 'zstd':
+        if zstandard is None:
+            raise DecompressionError("zstd uploads are not supported on this server", 415)
+        # stream_reader caps each read at CHUNK_SIZE, but at EOF it just returns
+        # b'' even mid-frame, so the tracker watches for an unfinished frame
+        tracker = _ZstdFrameTracker(reader)
+        zs = zstandard.ZstdDecompressor().stream_reader(
+            tracker, read_size=CHUNK_SIZE, read_across_frames=True)
+        with zs:
+            while True:
+                out = zs.read(CHUNK_SIZE)
+                if not out:
+                    break
+                yield out
+        if not tracker.finished:
+            raise DecompressionError("Truncated zstd upload")
+
+    elif encoding == 'br':
+        if brotli is None:
+            raise DecompressionError("brotli uploads are not supported on this server", 415)
+        decompressor = brotli.Decompressor()
+        while True:
+            # Drain pending output before feeding more, so one tiny chunk
+            # can't inflate into a huge buffer in a single call
+            if decompressor.can_accept_more_data():
+                chunk = reader.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+            else:
+                chunk = b''
+            out = decompressor.process(chunk, output_buffer_limit=CHUNK_SIZE)
+            if out:
+                yield out
+        if not decompressor.is_finished():
+            raise DecompressionError("Truncated brotli upload")
+
+    else:
+        raise DecompressionError(f"Unsupported Content-Encoding: {encoding}", 415)
+
+
+def decompress_stream(stream, encoding, max_size):
+    """
+    Decompresses a file-like object into a SpooledTemporaryFile.
+    Raises DecompressionError (413) as soon as the output passes max_size.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    total = 0
+    try:
+        for chunk in _iter_decompressed(stream, encoding, max_size):
+            total += len(chunk)
+            if total > max_size:
+                raise DecompressionError("Decompressed upload exceeds size limit", 413)
+            out.write(chunk)
+    except DecompressionError:
+        out.close()
+        raise
+    except Exception as e:
+        out.close()
+        raise DecompressionError(f"Failed to decompress upload: {e}")
+    out.seek(0)
+    return out, total
+
+
+def detect_file_encoding(file_storage):
+    """Returns the compression used by an uploaded file part, or None."""
+    header = file_storage.headers.get('Content-Encoding', '').strip().lower()
+    if header and header != 'identity':
+        return header
+
+    _, ext = os.path.splitext((file_storage.filename or '').lower())
+    if ext in FILE_SUFFIXES:
+        return FILE_SUFFIXES[ext]
+
+    return FILE_MIME_TYPES.get((file_storage.mimetype or '').lower())
+
+
+def decompress_file(file_storage, max_size):
+    """
+    Returns a FileStorage with the decompressed content of a compressed upload,
+    or the original one untouched if it isn't compressed.
+    "report.pdf.zst" comes back as "report.pdf" so file_parser sees the real type.
+    """
+    encoding = detect_file_encoding(file_storage)
+    if encoding is None:
+        return file_storage
+
+    filename = file_storage.filename or ''
+    base, ext = os.path.splitext(filename)
+    if ext.lower() in FILE_SUFFIXES:
+        filename = base
+
+    stream, _ = decompress_stream(file_storage.stream, encoding, max_size)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return FileStorage(stream=stream, filename=filename, name=file_storage.name,
+                       content_type=content_type)
+
+
+def decompress_request_body(environ, max_size):
+    """
+    before_request helper for bodies sent with "Content-Encoding: gzip|br|zstd".
+    Swaps wsgi.input for the decompressed body so form/JSON parsing works as usual.
+    Must run before anything reads request.stream.
+    """
+    encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+    if not encoding or encoding == 'identity':
+        return
+
+    # Bounded by Content-Length (413 if it's over max_size) so we never block
+    # reading past the end of the body on a keep-alive connection
+    try:
+        body = get_input_stream(environ, max_content_length=max_size)
+    except RequestEntityTooLarge:
+        raise DecompressionError("Upload too large", 413)
+
+    stream, total = decompress_stream(body, encoding, max_size)
+    environ['wsgi.input'] = stream
+    environ['CONTENT_LENGTH'] = str(total)
+    # The body now has a known length; drop the chunked framing markers or
+    # Werkzeug ignores CONTENT_LENGTH and reads an empty stream
+    environ.pop('HTTP_CONTENT_ENCODING', None)
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+    environ.pop('wsgi.input_terminated', None)
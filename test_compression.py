@@ -0,0 +1,179 @@
+
+import sys
+import os
+import io
+import gzip
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from werkzeug.datastructures import Accept, FileStorage
+from werkzeug.http import parse_accept_header
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+from flask import Flask, jsonify
+
+import http_compression
+from http_compression import DecompressionError
+import app as easein_app
+
+
+class TestResponseCompression(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def accept(self, value):
+        return parse_accept_header(value, Accept)
+
+    def test_prefers_zstd_when_client_accepts_all(self):
+        self.assertEqual(http_compression.choose_encoding(self.accept("gzip, br, zstd")), "zstd")
+
+    def test_respects_client_quality(self):
+        self.assertEqual(http_compression.choose_encoding(self.accept("zstd;q=0.1, gzip")), "gzip")
+        self.assertIsNone(http_compression.choose_encoding(self.accept("identity")))
+
+    def test_large_json_is_compressed(self):
+        with self.app.app_context():
+            response = jsonify({"tasks": ["Step %d: Do the thing" % i for i in range(200)]})
+            original = response.get_data()
+            response = http_compression.compress_response(response, self.accept("gzip"))
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()), original)
+
+    def test_small_json_is_left_alone(self):
+        with self.app.app_context():
+            response = jsonify({"status": "saved"})
+            response = http_compression.compress_response(response, self.accept("gzip"))
+        self.assertNotIn('Content-Encoding', response.headers)
+
+
+class TestUploadDecompression(unittest.TestCase):
+    def test_compressed_file_is_unpacked(self):
+        payload = b"Write the thesis abstract\n" * 100
+        for suffix, encoding in http_compression.FILE_SUFFIXES.items():
+            if encoding not in http_compression.supported_encodings():
+                continue
+            upload = FileStorage(stream=io.BytesIO(http_compression.compress_bytes(payload, encoding)),
+                                 filename="notes.txt" + suffix, name="file")
+            result = http_compression.decompress_file(upload, 16 * 1024 * 1024)
+            self.assertEqual(result.filename, "notes.txt")
+            self.assertEqual(result.read(), payload)
+
+    def test_plain_file_is_untouched(self):
+        upload = FileStorage(stream=io.BytesIO(b"hello"), filename="notes.txt", name="file")
+        self.assertIs(http_compression.decompress_file(upload, 1024), upload)
+
+    def test_decompression_bomb_is_rejected(self):
+        for encoding in http_compression.supported_encodings():
+            bomb = http_compression.compress_bytes(b"\0" * (1024 * 1024), encoding)
+            with self.assertRaises(DecompressionError) as ctx:
+                http_compression.decompress_stream(io.BytesIO(bomb), encoding, 64 * 1024)
+            self.assertEqual(ctx.exception.status, 413)
+
+    def test_truncated_upload_is_rejected(self):
+        payload = os.urandom(100 * 1024) + b"Read chapter one\n" * 10000
+        for encoding in http_compression.supported_encodings():
+            data = http_compression.compress_bytes(payload, encoding)
+            with self.assertRaises(DecompressionError) as ctx:
+                http_compression.decompress_stream(io.BytesIO(data[:len(data) // 2]), encoding, 16 * 1024 * 1024)
+            self.assertEqual(ctx.exception.status, 400)
+
+    def test_multi_frame_zstd_upload(self):
+        if 'zstd' not in http_compression.supported_encodings():
+            self.skipTest("zstandard not installed")
+        data = http_compression.compress_bytes(b"first\n", 'zstd') + http_compression.compress_bytes(b"second\n", 'zstd')
+        stream, total = http_compression.decompress_stream(io.BytesIO(data), 'zstd', 1024)
+        self.assertEqual(stream.read(), b"first\nsecond\n")
+        self.assertEqual(total, 13)
+
+    def test_compressed_request_body(self):
+        body = gzip.compress(b'{"tasks": ["a", "b"]}')
+        environ = {
+            'HTTP_CONTENT_ENCODING': 'gzip',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        }
+        http_compression.decompress_request_body(environ, 1024)
+        self.assertNotIn('HTTP_CONTENT_ENCODING', environ)
+        self.assertEqual(environ['wsgi.input'].read(), b'{"tasks": ["a", "b"]}')
+        self.assertEqual(environ['CONTENT_LENGTH'], str(len(b'{"tasks": ["a", "b"]}')))
+
+    def test_unknown_encoding_is_rejected(self):
+        environ = {'HTTP_CONTENT_ENCODING': 'lzma', 'CONTENT_LENGTH': '3', 'wsgi.input': io.BytesIO(b"abc")}
+        with self.assertRaises(DecompressionError) as ctx:
+            http_compression.decompress_request_body(environ, 1024)
+        self.assertEqual(ctx.exception.status, 415)
+
+class TestAppCompression(unittest.TestCase):
+    def setUp(self):
+        self.client = easein_app.app.test_client()
+        fd, self.history_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        patcher = patch.object(easein_app, 'HISTORY_FILE', self.history_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(os.remove, self.history_file)
+
+    @patch('app.generate_tasks', return_value=["Step 1: Open the file"])
+    def test_gzip_encoded_multipart_upload(self, mock_generate):
+        builder = EnvironBuilder(method='POST', path='/api/generate-tasks',
+                                 data={'text': "Write my thesis", 'instructions': "Be brief"})
+        body = builder.get_environ()['wsgi.input'].read()
+        response = self.client.post('/api/generate-tasks', data=gzip.compress(body),
+                                    content_type=builder.content_type,
+                                    headers={'Content-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"tasks": ["Step 1: Open the file"]})
+        content_data, instructions = mock_generate.call_args[0]
+        self.assertEqual(content_data, {"type": "text", "content": "Write my thesis"})
+        self.assertEqual(instructions, "Be brief")
+
+    @patch('app.generate_tasks', return_value=["Step 1: Read chapter one"])
+    def test_zst_file_part(self, mock_generate):
+        if 'zstd' not in http_compression.supported_encodings():
+            self.skipTest("zstandard not installed")
+        payload = b"Read chapter one\n" * 100
+        upload = (io.BytesIO(http_compression.compress_bytes(payload, 'zstd')), 'notes.txt.zst')
+        response = self.client.post('/api/generate-tasks', data={'file': upload})
+        self.assertEqual(response.status_code, 200)
+        content_data = mock_generate.call_args[0][0]
+        self.assertEqual(content_data, {"type": "text", "content": payload.decode()})
+
+    def test_static_get_ignores_unknown_content_encoding(self):
+        response = self.client.get('/index.html', headers={'Content-Encoding': 'deflate'})
+        self.assertNotEqual(response.status_code, 415)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_chunked_compressed_body(self):
+        body = gzip.compress(json.dumps({"tasks": ["a", "b"]}).encode())
+        environ = EnvironBuilder(method='POST', path='/api/save-history', data=body,
+                                 content_type='application/json',
+                                 headers={'Content-Encoding': 'gzip',
+                                          'Transfer-Encoding': 'chunked'}).get_environ()
+        # How gunicorn / the dev server hand over a chunked body: no length, terminated input
+        environ.pop('CONTENT_LENGTH', None)
+        environ['wsgi.input_terminated'] = True
+        # run_wsgi_app keeps the environ as-is; the test client would rebuild it
+        app_iter, status, _ = run_wsgi_app(easein_app.app, environ)
+        b''.join(app_iter)
+        self.assertEqual(status, '200 OK')
+        with open(self.history_file, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]["tasks"], ["a", "b"])
+
+    def test_large_history_response_is_compressed(self):
+        history = [{"tasks": ["Step %d: Do the thing" % i for i in range(50)]}]
+        with open(self.history_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f)
+        response = self.client.get('/api/history', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.get_data())), history)
+
+if __name__ == '__main__':
+    unittest.main()